@@ -0,0 +1,190 @@
+import json
+import os
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Configuration du client (surchargeable par variables d'environnement)
+API_BASE_URL = os.getenv("AMS_API_URL", "http://localhost:8000")
+API_CONNECT_TIMEOUT = float(os.getenv("AMS_API_CONNECT_TIMEOUT", "3"))
+API_READ_TIMEOUT = float(os.getenv("AMS_API_READ_TIMEOUT", "10"))
+API_STREAM_READ_TIMEOUT = 60  # Supérieur au battement de cœur du flux SSE
+API_RETRIES = int(os.getenv("AMS_API_RETRIES", "3"))
+API_RETRY_BACKOFF = 0.5
+API_ETAG_CACHE_SIZE = 128  # Réponses gardées pour les requêtes conditionnelles
+
+def create_session(retries):
+    """Session keep-alive avec reprises exponentielles sur les erreurs transitoires"""
+    retry = Retry(
+        total=retries,
+        backoff_factor=API_RETRY_BACKOFF,
+        status_forcelist=(429, 502, 503, 504),
+        allowed_methods=None,  # Les écritures du client (seuils) sont idempotentes
+        raise_on_status=False)
+    adapter = HTTPAdapter(max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+class ApiClient:
+    """Accès à l'API du serveur. Les méthodes sont bloquantes ; submit() les
+    exécute sur un unique thread de fond et rappelle callback/errback depuis
+    ce thread (à décorer avec @mainthread côté Kivy)."""
+
+    def __init__(self, base_url=API_BASE_URL, connect_timeout=API_CONNECT_TIMEOUT,
+                 read_timeout=API_READ_TIMEOUT, retries=API_RETRIES, profiler=None):
+        self.base_url = base_url.rstrip("/")
+        self.profiler = profiler  # Optionnel : objet avec measure(étape) -> gestionnaire de contexte
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = create_session(retries)
+        # Le flux SSE bloque son thread : il a sa propre session
+        self.stream_session = requests.Session()
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="api-client")
+        # (chemin, paramètres) -> (ETag, données) ; utilisé depuis le seul thread de fond
+        self.etag_cache = OrderedDict()
+
+    def url(self, path):
+        return f"{self.base_url}{path}"
+
+    def measure(self, stage):
+        return self.profiler.measure(stage) if self.profiler else nullcontext()
+
+    def get_json(self, path, params=None):
+        """GET conditionnel : renvoie l'ETag de la réponse précédente et, sur
+        304, réutilise ses données sans rien retransférer ni décoder (données
+        partagées avec le cache : à ne pas modifier)"""
+        key = (path, tuple(sorted((params or {}).items())))
+        cached = self.etag_cache.get(key)
+        headers = {"If-None-Match": cached[0]} if cached else None
+        response = self.session.get(self.url(path), params=params, headers=headers, timeout=self.timeout)
+        if response.status_code == 304 and cached:
+            self.etag_cache.move_to_end(key)
+            return cached[1]
+        self.etag_cache.pop(key, None)
+        response.raise_for_status()
+        data = response.json()
+        etag = response.headers.get("ETag")
+        if etag:
+            self.etag_cache[key] = (etag, data)
+            self.etag_cache.move_to_end(key)
+            while len(self.etag_cache) > API_ETAG_CACHE_SIZE:
+                self.etag_cache.popitem(last=False)
+        return data
+
+    def submit(self, method, *args, callback=None, errback=None):
+        """Exécute method(*args) sur le thread de fond et retourne le Future"""
+        def done(future):
+            error = future.exception()
+            if error is not None:
+                if errback:
+                    errback(error)
+            elif callback:
+                callback(future.result())
+
+        future = self.executor.submit(method, *args)
+        future.add_done_callback(done)
+        return future
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+        self.session.close()
+        self.stream_session.close()
+
+    def get_motors(self):
+        response = self.session.get(self.url("/api/motors"), timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def get_latest(self, motor_ids):
+        with self.measure("fetch"):
+            response = self.session.get(
+                self.url("/api/data/latest"),
+                params={"motor_ids": ",".join(str(motor_id) for motor_id in motor_ids)},
+                timeout=self.timeout)
+            response.raise_for_status()
+        with self.measure("parse"):
+            return response.json()
+
+    def get_history(self, motor_id, limit, since=None):
+        """limit dernières mesures brutes d'un moteur, plus récentes d'abord ;
+        avec since, seulement celles qui lui sont postérieures"""
+        params = {"limit": limit}
+        if since:
+            params["since"] = since
+        return self.get_json(f"/api/data/{motor_id}/history", params)
+
+    def get_thresholds(self, motor_id):
+        """Seuils d'un moteur, ou None s'ils ne sont pas configurés"""
+        try:
+            return self.get_json(f"/api/thresholds/{motor_id}")
+        except requests.HTTPError as e:
+            if e.response.status_code == 404:
+                return None
+            raise
+
+    def update_thresholds(self, motor_id, temp_max, voltage_min, voltage_max):
+        response = self.session.post(
+            self.url("/api/thresholds/"),
+            json={
+                "motor_id": motor_id,
+                "temp_max": temp_max,
+                "voltage_min": voltage_min,
+                "voltage_max": voltage_max
+            },
+            timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def acknowledge_alerts(self, motor_id, alert_type=None):
+        response = self.session.post(
+            self.url("/api/alerts/acknowledge"),
+            json={"motor_id": motor_id, "alert_type": alert_type},
+            timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def download_export(self, motor_id, format, path, start=None, end=None):
+        """Enregistre l'export serveur d'un moteur dans path, en flux"""
+        params = {"format": format}
+        if start:
+            params["start"] = start.isoformat()
+        if end:
+            params["end"] = end.isoformat()
+        with self.session.get(
+                self.url(f"/api/data/{motor_id}/export"),
+                params=params,
+                stream=True,
+                timeout=self.timeout) as response:
+            response.raise_for_status()
+            with open(path, "wb") as output:
+                for chunk in response.iter_content(chunk_size=65536):
+                    output.write(chunk)
+        return path
+
+    def stream_events(self, stop, motor_ids=None):
+        """Générateur (événement, données) sur une connexion SSE ; se termine
+        quand le serveur ferme le flux ou que stop est positionné"""
+        params = {"motor_ids": ",".join(str(motor_id) for motor_id in motor_ids)} if motor_ids else None
+        with self.stream_session.get(
+                self.url("/api/stream"),
+                params=params,
+                stream=True,
+                timeout=(self.timeout[0], API_STREAM_READ_TIMEOUT)) as response:
+            response.raise_for_status()
+            event = None
+            for line in response.iter_lines(chunk_size=None, decode_unicode=True):
+                if stop.is_set():
+                    return
+                if line.startswith("event:"):
+                    event = line[len("event:"):].strip()
+                elif line.startswith("data:") and event:
+                    with self.measure("parse"):
+                        data = json.loads(line[len("data:"):])
+                    yield event, data
+                elif not line:
+                    event = None
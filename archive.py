@@ -0,0 +1,160 @@
+import io
+import os
+from datetime import datetime, timedelta
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+
+# Configuration de l'archive (surchargeable par variables d'environnement)
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "archive")
+ARCHIVE_COMPRESSION = os.getenv("ARCHIVE_COMPRESSION", "zstd")
+ARCHIVE_ROW_GROUP_SIZE = int(os.getenv("ARCHIVE_ROW_GROUP_SIZE", "131072"))
+
+# Colonnes d'une mesure ; float64 pour ne rien perdre quel que soit le stockage
+READING_SCHEMA = pa.schema([
+    ("id", pa.int64()),
+    ("motor_id", pa.int32()),
+    ("timestamp", pa.timestamp("us")),
+    ("temperature", pa.float64()),
+    ("voltage", pa.float64()),
+])
+
+# Arborescence Hive : <racine>/motor_id=1/date=2025-04-07/part-0.parquet
+ARCHIVE_PARTITIONING = ds.partitioning(
+    pa.schema([("motor_id", pa.int32()), ("date", pa.string())]), flavor="hive")
+
+def record_batch(rows):
+    """Convertit une liste de mesures (dict) en lot Arrow colonne par colonne"""
+    return pa.RecordBatch.from_pydict(
+        {name: [row[name] for row in rows] for name in READING_SCHEMA.names},
+        schema=READING_SCHEMA)
+
+class StreamEncoder:
+    """Encode des lots de mesures en Parquet ou en flux Arrow IPC ; write()
+    et close() retournent les octets produits depuis l'appel précédent, pour
+    une réponse HTTP en flux à mémoire constante"""
+
+    def __init__(self, format):
+        self.buffer = io.BytesIO()
+        if format == "parquet":
+            self.writer = pq.ParquetWriter(
+                self.buffer, READING_SCHEMA, compression=ARCHIVE_COMPRESSION)
+        else:
+            self.writer = pa.ipc.new_stream(
+                self.buffer, READING_SCHEMA,
+                options=pa.ipc.IpcWriteOptions(compression=ARCHIVE_COMPRESSION))
+
+    def take(self):
+        data = self.buffer.getvalue()
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        return data
+
+    def write(self, rows):
+        # Un groupe de lignes Parquet par lot : le lot doit rester conséquent
+        self.writer.write_batch(record_batch(rows))
+        return self.take()
+
+    def close(self):
+        self.writer.close()
+        return self.take()
+
+def partition_path(root, motor_id, day):
+    return os.path.join(root, f"motor_id={motor_id}", f"date={day.isoformat()}", "part-0.parquet")
+
+class ArchiveWriter:
+    """Écrit des mesures triées par (motor_id, timestamp) en un fichier Parquet
+    par moteur et par jour. Chaque fichier est écrit à côté puis renommé : un
+    jour archivé à nouveau est remplacé d'un bloc, jamais lu à moitié écrit."""
+
+    def __init__(self, root=ARCHIVE_DIR):
+        self.root = root
+        self.key = None
+        self.writer = None
+        self.path = None
+        self.temp_path = None
+        self.files = []
+        self.rows = 0
+
+    def open(self, key):
+        self.key = key
+        self.path = partition_path(self.root, *key)
+        directory, name = os.path.split(self.path)
+        # Fichiers en « . » ignorés par open_archive pendant l'écriture
+        self.temp_path = os.path.join(directory, f".{name}.tmp")
+        os.makedirs(directory, exist_ok=True)
+        self.writer = pq.ParquetWriter(
+            self.temp_path, READING_SCHEMA, compression=ARCHIVE_COMPRESSION)
+
+    def finish(self):
+        if self.writer is None:
+            return
+        self.writer.close()
+        os.replace(self.temp_path, self.path)
+        self.files.append(self.path)
+        self.writer = None
+
+    def write(self, rows):
+        """Ajoute un lot ; les mesures d'un même fichier sont contiguës grâce au tri"""
+        start = 0
+        for i, row in enumerate(rows):
+            key = (row['motor_id'], row['timestamp'].date())
+            if key != self.key:
+                if i > start:
+                    self.flush(rows[start:i])
+                self.finish()
+                self.open(key)
+                start = i
+        if start < len(rows):
+            self.flush(rows[start:])
+
+    def flush(self, rows):
+        self.writer.write_table(
+            pa.Table.from_batches([record_batch(rows)]), row_group_size=ARCHIVE_ROW_GROUP_SIZE)
+        self.rows += len(rows)
+
+    def close(self):
+        self.finish()
+        return self.files
+
+    def abort(self):
+        if self.writer is not None:
+            self.writer.close()
+            os.remove(self.temp_path)
+            self.writer = None
+
+def day_range(start, end):
+    """Bornes alignées sur le jour pour ne jamais réécrire un jour partiellement"""
+    start = datetime.combine(start.date(), datetime.min.time()) if start else None
+    if end and end != datetime.combine(end.date(), datetime.min.time()):
+        end = datetime.combine(end.date(), datetime.min.time()) + timedelta(days=1)
+    return start, end
+
+def open_archive(root=ARCHIVE_DIR):
+    """Jeu de données Arrow sur l'archive, fichiers lus par mappage mémoire"""
+    return ds.dataset(
+        root,
+        format="parquet",
+        partitioning=ARCHIVE_PARTITIONING,
+        filesystem=pafs.LocalFileSystem(use_mmap=True))
+
+def read_archive(motor_id=None, start=None, end=None, columns=None, root=ARCHIVE_DIR):
+    """Lit les mesures archivées sans interroger la base (table Arrow ;
+    .to_pandas() pour l'analyse). Seuls les fichiers des moteurs et jours
+    demandés sont ouverts."""
+    if not os.path.isdir(root):
+        return READING_SCHEMA.empty_table()
+    condition = ds.scalar(True)
+    if motor_id is not None:
+        condition &= ds.field("motor_id") == motor_id
+    if start is not None:
+        condition &= ds.field("date") >= start.date().isoformat()
+        condition &= ds.field("timestamp") >= pa.scalar(start, pa.timestamp("us"))
+    if end is not None:
+        condition &= ds.field("date") <= end.date().isoformat()
+        condition &= ds.field("timestamp") < pa.scalar(end, pa.timestamp("us"))
+    table = open_archive(root).to_table(columns=columns or READING_SCHEMA.names, filter=condition)
+    keys = [name for name in ("motor_id", "timestamp", "id") if name in table.column_names]
+    return table.sort_by([(name, "ascending") for name in keys])
@@ -0,0 +1,296 @@
+"""Banc de charge de l'API : ingestion, historique et seuils.
+
+Sans --url, l'application est chargée dans ce processus (sans réseau) sur
+une base SQLite temporaire ou sur la base PostgreSQL configurée ; avec
+--url, un serveur déjà lancé est mesuré. Les résultats (débit, latences
+p50/p95/p99) sont écrits en JSON et peuvent être comparés à un run précédent :
+
+    python benchmark.py --motors 8 --rate 50 --duration 20 --output benchmark_run.json
+    python benchmark.py --compare benchmark_run.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+
+import httpx
+import numpy as np
+
+SCENARIOS = ("ingest", "history", "history_cached", "thresholds")
+
+def percentiles(latencies):
+    if not latencies:
+        return {}
+    values = np.array(latencies) * 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"p50": p50, "p95": p95, "p99": p99, "mean": values.mean(), "max": values.max()}
+
+class Recorder:
+    """Latences et erreurs d'un scénario"""
+
+    def __init__(self, name):
+        self.name = name
+        self.latencies = []
+        self.errors = 0
+        self.status = {}
+        self.started = None
+        self.finished = None
+
+    def record(self, latency, status):
+        self.status[status] = self.status.get(status, 0) + 1
+        if 200 <= status < 300:
+            self.latencies.append(latency)
+        else:
+            self.errors += 1
+
+    def result(self):
+        elapsed = self.finished - self.started
+        return {
+            "requests": len(self.latencies) + self.errors,
+            "errors": self.errors,
+            "status": {str(status): count for status, count in sorted(self.status.items())},
+            "duration_s": elapsed,
+            "throughput_rps": len(self.latencies) / elapsed if elapsed else 0.0,
+            "latency_ms": percentiles(self.latencies),
+        }
+
+async def timed(client, recorder, scheduled, method, url, **kwargs):
+    """Exécute une requête ; la latence part de l'heure prévue, pas de l'envoi,
+    pour ne pas masquer l'attente quand le serveur prend du retard"""
+    try:
+        response = await client.request(method, url, **kwargs)
+        status = response.status_code
+    except httpx.HTTPError:
+        status = 0
+    recorder.record(time.perf_counter() - scheduled, status)
+
+async def open_loop(recorder, rate, duration, concurrency, request):
+    """Envoie rate requêtes/s pendant duration secondes, au plus concurrency en vol"""
+    semaphore = asyncio.Semaphore(concurrency)
+    tasks = []
+
+    async def run(scheduled, index):
+        async with semaphore:
+            await request(recorder, scheduled, index)
+
+    recorder.started = time.perf_counter()
+    for index in range(int(rate * duration)):
+        scheduled = recorder.started + index / rate
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(run(scheduled, index)))
+    await asyncio.gather(*tasks)
+    recorder.finished = time.perf_counter()
+
+async def closed_loop(recorder, duration, concurrency, request):
+    """concurrency clients qui enchaînent les requêtes pendant duration secondes"""
+    recorder.started = time.perf_counter()
+    deadline = recorder.started + duration
+
+    async def worker(worker_id):
+        index = worker_id
+        while time.perf_counter() < deadline:
+            await request(recorder, time.perf_counter(), index)
+            index += concurrency
+
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    recorder.finished = time.perf_counter()
+
+async def bench_ingest(client, args):
+    """POST /api/data/ au rythme de --rate mesures/s par moteur (charge ouverte)"""
+    recorder = Recorder("ingest")
+
+    async def request(recorder, scheduled, index):
+        reading = {
+            "motor_id": index % args.motors + 1,
+            "temperature": random.gauss(60, 5),
+            "voltage": random.gauss(220, 3),
+        }
+        await timed(client, recorder, scheduled, "POST", "/api/data/", json=reading)
+
+    await open_loop(recorder, args.rate * args.motors, args.duration, args.concurrency, request)
+    return recorder
+
+async def bench_history(client, args):
+    """GET /api/data/{id}/history : brut (limit) et réduit (points), en charge fermée.
+    Chaque URL est unique (paramètre _ ignoré par l'API) : le cache de réponses
+    n'est jamais utilisé, on mesure la requête en base et la sérialisation."""
+    recorder = Recorder("history")
+
+    async def request(recorder, scheduled, index):
+        motor_id = index % args.motors + 1
+        params = {"limit": 100} if index % 2 else {"points": 500}
+        params["_"] = index
+        await timed(client, recorder, scheduled, "GET", f"/api/data/{motor_id}/history", params=params)
+
+    await closed_loop(recorder, args.duration, args.concurrency, request)
+    return recorder
+
+async def bench_history_cached(client, args):
+    """Mêmes requêtes d'historique répétées : réponses servies par le cache
+    de réponses du serveur, tant qu'aucune mesure n'arrive"""
+    recorder = Recorder("history_cached")
+
+    async def request(recorder, scheduled, index):
+        motor_id = index % args.motors + 1
+        params = {"limit": 100} if index % 2 else {"points": 500}
+        await timed(client, recorder, scheduled, "GET", f"/api/data/{motor_id}/history", params=params)
+
+    await closed_loop(recorder, args.duration, args.concurrency, request)
+    return recorder
+
+async def bench_thresholds(client, args):
+    """Lectures de seuils avec une écriture sur dix, en charge fermée"""
+    recorder = Recorder("thresholds")
+
+    async def request(recorder, scheduled, index):
+        motor_id = index % args.motors + 1
+        if index % 10 == 0:
+            await timed(client, recorder, scheduled, "POST", "/api/thresholds/", json={
+                "motor_id": motor_id, "temp_max": 80.0, "voltage_min": 200.0, "voltage_max": 240.0})
+        else:
+            await timed(client, recorder, scheduled, "GET", f"/api/thresholds/{motor_id}")
+
+    await closed_loop(recorder, args.duration, args.concurrency, request)
+    return recorder
+
+BENCHMARKS = {
+    "ingest": bench_ingest,
+    "history": bench_history,
+    "history_cached": bench_history_cached,
+    "thresholds": bench_thresholds,
+}
+
+@asynccontextmanager
+async def api_client(args):
+    """Client HTTP vers --url, ou vers l'application chargée dans ce processus"""
+    timeout = httpx.Timeout(args.timeout)
+    limits = httpx.Limits(max_connections=args.concurrency)
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, timeout=timeout, limits=limits) as client:
+            yield client
+        return
+    # Configuration lue à l'import du serveur
+    os.environ["STORAGE_BACKEND"] = args.backend
+    if args.backend == "sqlite":
+        os.environ["SQLITE_PATH"] = args.sqlite_path
+    import server
+    async with server.lifespan(server.app):
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=timeout) as client:
+            yield client
+
+async def seed(client, args):
+    """Seuils et historique minimal pour que toutes les routes aient des données"""
+    for motor_id in range(1, args.motors + 1):
+        response = await client.post("/api/thresholds/", json={
+            "motor_id": motor_id, "temp_max": 80.0, "voltage_min": 200.0, "voltage_max": 240.0})
+        response.raise_for_status()
+    readings = [
+        {"motor_id": i % args.motors + 1, "temperature": random.gauss(60, 5), "voltage": random.gauss(220, 3)}
+        for i in range(args.seed_rows)]
+    for i in range(0, len(readings), 5000):
+        response = await client.post("/api/data/batch", json=readings[i:i + 5000])
+        response.raise_for_status()
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+async def run(args):
+    results = {}
+    started_at = datetime.now()
+    async with api_client(args) as client:
+        if args.seed_rows:
+            await seed(client, args)
+        for name in args.scenarios:
+            recorder = await BENCHMARKS[name](client, args)
+            results[name] = recorder.result()
+            print_result(name, results[name])
+    return {
+        "started_at": started_at.isoformat(),
+        "revision": git_revision(),
+        "target": args.url or f"in-process ({args.backend})",
+        "parameters": {
+            "motors": args.motors,
+            "rate": args.rate,
+            "duration": args.duration,
+            "concurrency": args.concurrency,
+            "seed_rows": args.seed_rows,
+        },
+        "results": results,
+    }
+
+def print_result(name, result):
+    latency = result["latency_ms"]
+    print(f"{name:<14} {result['throughput_rps']:9.1f} req/s  "
+          f"p50 {latency.get('p50', 0):7.2f} ms  p95 {latency.get('p95', 0):7.2f} ms  "
+          f"p99 {latency.get('p99', 0):7.2f} ms  erreurs {result['errors']}")
+
+def compare(previous, current, tolerance):
+    """Affiche les écarts avec un run précédent ; retourne les régressions"""
+    regressions = []
+    for name, result in current["results"].items():
+        before = previous["results"].get(name)
+        if not before or not before["latency_ms"] or not result["latency_ms"]:
+            continue
+        p95_change = (
+            result["latency_ms"]["p95"] / before["latency_ms"]["p95"] - 1 if before["latency_ms"]["p95"] else 0.0)
+        throughput_change = (
+            result["throughput_rps"] / before["throughput_rps"] - 1 if before["throughput_rps"] else 0.0)
+        print(f"{name:<14} débit {throughput_change:+7.1%}  p95 {p95_change:+7.1%}")
+        if p95_change > tolerance or throughput_change < -tolerance:
+            regressions.append(name)
+    return regressions
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="serveur à mesurer (par défaut : application dans ce processus)")
+    parser.add_argument("--backend", choices=("sqlite", "postgres"), default="sqlite",
+                        help="stockage de l'application dans ce processus")
+    parser.add_argument("--sqlite-path", help="fichier SQLite (par défaut : fichier temporaire)")
+    parser.add_argument("--motors", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=25.0, help="mesures/s par moteur")
+    parser.add_argument("--duration", type=float, default=10.0, help="secondes par scénario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seed-rows", type=int, default=10000, help="mesures insérées avant les mesures")
+    parser.add_argument("--timeout", type=float, default=10.0)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--output", help="fichier JSON des résultats")
+    parser.add_argument("--compare", help="résultats JSON d'un run précédent")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="écart relatif toléré avant de signaler une régression")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    with tempfile.TemporaryDirectory() as directory:
+        if not args.url and args.backend == "sqlite" and not args.sqlite_path:
+            args.sqlite_path = os.path.join(directory, "benchmark.db")
+        report = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+    if args.compare:
+        with open(args.compare) as previous:
+            regressions = compare(json.load(previous), report, args.tolerance)
+        if regressions:
+            print(f"Régressions : {', '.join(regressions)}")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+# Cache local des mesures du tableau de bord (surchargeable par variables d'environnement)
+CACHE_PATH = os.getenv("AMS_CACHE_PATH", "dashboard_cache.db")
+CACHE_MAX_ROWS = int(os.getenv("AMS_CACHE_MAX_ROWS", "36000"))  # Mesures gardées par moteur
+CACHE_SYNC_INTERVAL = float(os.getenv("AMS_CACHE_SYNC_INTERVAL", "60"))  # secondes
+CACHE_FLUSH_INTERVAL = 2  # secondes entre deux écritures des mesures reçues en direct
+
+def normalize_timestamp(timestamp):
+    """Horodatage ISO à précision fixe : l'ordre du texte est celui du temps"""
+    if not isinstance(timestamp, datetime):
+        timestamp = datetime.fromisoformat(timestamp)
+    return timestamp.isoformat(timespec="microseconds")
+
+class ReadingCache:
+    """Mesures déjà reçues, conservées entre deux lancements dans une base
+    SQLite au schéma de thermocouple.db. synced_until() est l'horodatage
+    jusqu'auquel l'historique du serveur a été récupéré : seules les mesures
+    postérieures sont redemandées. Utilisable depuis plusieurs threads."""
+
+    def __init__(self, path=CACHE_PATH, max_rows=CACHE_MAX_ROWS):
+        self.max_rows = max_rows
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS thermocouple_data (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    motor_id INTEGER,
+                    temperature REAL,
+                    voltage REAL,
+                    timestamp DATETIME
+                )""")
+            # Une mesure reçue en direct puis par synchronisation n'est gardée qu'une fois
+            self.conn.execute("""
+                CREATE UNIQUE INDEX IF NOT EXISTS thermocouple_data_motor_timestamp
+                ON thermocouple_data (motor_id, timestamp)""")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS sync_state (
+                    motor_id INTEGER PRIMARY KEY,
+                    synced_until DATETIME
+                )""")
+
+    def add_readings(self, readings, synced=False):
+        """Enregistre des mesures (dict avec motor_id, temperature, voltage, timestamp).
+        synced : mesures reçues par un flux continu depuis la dernière
+        synchronisation, synced_until avance jusqu'à la plus récente"""
+        rows = [
+            (reading['motor_id'], reading['temperature'], reading['voltage'],
+             normalize_timestamp(reading['timestamp']))
+            for reading in readings if reading.get('timestamp')]
+        if not rows:
+            return
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO thermocouple_data (motor_id, temperature, voltage, timestamp) "
+                "VALUES (?, ?, ?, ?)", rows)
+            if synced:
+                latest = {}
+                for motor_id, _, _, timestamp in rows:
+                    latest[motor_id] = max(timestamp, latest.get(motor_id, timestamp))
+                # Seulement pour les moteurs déjà synchronisés une première fois
+                self.conn.executemany(
+                    "UPDATE sync_state SET synced_until = MAX(synced_until, ?) WHERE motor_id = ?",
+                    [(timestamp, motor_id) for motor_id, timestamp in latest.items()])
+
+    def recent(self, motor_id, count):
+        """count dernières mesures d'un moteur, de la plus ancienne à la plus récente"""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT temperature, voltage, timestamp FROM thermocouple_data "
+                "WHERE motor_id = ? ORDER BY timestamp DESC LIMIT ?", (motor_id, count)).fetchall()
+        rows.reverse()
+        return [{"temperature": temperature, "voltage": voltage, "timestamp": timestamp}
+                for temperature, voltage, timestamp in rows]
+
+    def synced_until(self, motor_id):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT synced_until FROM sync_state WHERE motor_id = ?", (motor_id,)).fetchone()
+        return row[0] if row else None
+
+    def set_synced_until(self, motor_id, timestamp):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO sync_state (motor_id, synced_until) VALUES (?, ?) "
+                "ON CONFLICT (motor_id) DO UPDATE SET synced_until = MAX(synced_until, excluded.synced_until)",
+                (motor_id, normalize_timestamp(timestamp)))
+
+    def prune(self, motor_id):
+        """Ne garde que les max_rows mesures les plus récentes du moteur"""
+        with self.lock, self.conn:
+            self.conn.execute(
+                "DELETE FROM thermocouple_data WHERE motor_id = ? AND timestamp < ("
+                "SELECT timestamp FROM thermocouple_data WHERE motor_id = ? "
+                "ORDER BY timestamp DESC LIMIT 1 OFFSET ?)",
+                (motor_id, motor_id, self.max_rows - 1))
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -1,6 +1,8 @@
 from kivy.app import App
 from kivy.uix.label import Label
 from kivy.uix.boxlayout import BoxLayout
+from kivy.uix.gridlayout import GridLayout
+from kivy.uix.scrollview import ScrollView
 from kivy.uix.textinput import TextInput
 from kivy.uix.button import Button
 from kivy.uix.screenmanager import ScreenManager, Screen
@@ -22,9 +24,15 @@ import csv
 import os
 import requests
 import time
+from api_client import ApiClient
+from local_cache import ReadingCache, CACHE_FLUSH_INTERVAL, CACHE_SYNC_INTERVAL, normalize_timestamp
 from kivy.core.audio import SoundLoader
 from functools import partial
-from threading import Thread
+from threading import Thread, Event, get_ident
+from collections import deque, OrderedDict
+from contextlib import contextmanager, nullcontext
+import json
+import numpy as np
 
 # Couleurs modernes (Material Design)
 PRIMARY_COLOR = get_color_from_hex("#6200EE")
@@ -43,6 +51,219 @@ MOTOR_COLORS = [
     get_color_from_hex("#9C27B0")
 ]
 
+# Alertes calculées par le serveur : messages et carte concernée
+ALERT_MESSAGES = {
+    'HIGH_TEMP': "Température trop élevée (> {temp}°C)",
+    'HIGH_TEMP_AVG': "Température moyenne trop élevée (> {temp}°C)",
+    'TEMP_RATE': "Variation de température trop rapide",
+    'VOLTAGE_ANOMALY': "Tension hors limites (< {voltage_min}V ou > {voltage_max}V)",
+}
+TEMP_ALERTS = {'HIGH_TEMP', 'HIGH_TEMP_AVG', 'TEMP_RATE'}
+VOLTAGE_ALERTS = {'VOLTAGE_ANOMALY'}
+
+# Profilage (AMS_PROFILE=1) : incrustation des temps par étape (F12 pour la
+# masquer), trace écrite avec F11 et à la fermeture
+PROFILE_ENABLED = os.getenv("AMS_PROFILE", "0") == "1"
+PROFILE_CAPACITY = int(os.getenv("AMS_PROFILE_CAPACITY", "600"))  # Mesures gardées par étape
+PROFILE_TRACE_PATH = os.getenv("AMS_PROFILE_TRACE", "dashboard_trace.json")
+PROFILE_OVERLAY_INTERVAL = 0.5
+NULL_CONTEXT = nullcontext()
+
+class FrameProfiler:
+    """Temps par étape (fetch, parse, update, graphs, canvas) et durée des
+    images dans des tampons circulaires. measure() ne coûte rien quand le
+    profilage est désactivé et peut être appelé depuis n'importe quel thread."""
+    
+    def __init__(self, enabled=False, capacity=PROFILE_CAPACITY):
+        self.enabled = enabled
+        self.capacity = capacity
+        self.stages = {}
+        self.frames = deque(maxlen=capacity)
+        self.trace = deque(maxlen=capacity * 8)
+        self.origin = time.perf_counter()
+        self.frame_event = None
+    
+    def measure(self, stage):
+        if not self.enabled:
+            return NULL_CONTEXT
+        return self.timed(stage)
+    
+    @contextmanager
+    def timed(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, start, time.perf_counter() - start)
+    
+    def record(self, stage, start, duration):
+        samples = self.stages.get(stage)
+        if samples is None:
+            samples = self.stages.setdefault(stage, deque(maxlen=self.capacity))
+        samples.append(duration)
+        self.trace.append((stage, start, duration, get_ident()))
+    
+    def on_frame(self, dt):
+        # Appelé une fois par image : dt couvre nos rappels, la mise en page et le dessin
+        self.frames.append(dt)
+        self.trace.append(("frame", time.perf_counter() - dt, dt, get_ident()))
+    
+    def start(self):
+        if self.enabled and self.frame_event is None:
+            self.frame_event = Clock.schedule_interval(self.on_frame, 0)
+    
+    def stop(self):
+        if self.frame_event:
+            self.frame_event.cancel()
+            self.frame_event = None
+    
+    def summary(self):
+        """{étape: (p50, p95, max)} en millisecondes, images comprises"""
+        result = {}
+        for stage, samples in [('frame', self.frames)] + sorted(self.stages.items()):
+            if samples:
+                values = np.array(samples) * 1000
+                p50, p95 = np.percentile(values, [50, 95])
+                result[stage] = (p50, p95, values.max())
+        return result
+    
+    def report(self):
+        lines = []
+        if self.frames:
+            lines.append(f"FPS {len(self.frames) / max(sum(self.frames), 1e-9):.1f}")
+        for stage, (p50, p95, peak) in self.summary().items():
+            lines.append(f"{stage:<7} p50 {p50:6.2f}  p95 {p95:6.2f}  max {peak:6.2f} ms")
+        return "\n".join(lines)
+    
+    def dump(self, path=PROFILE_TRACE_PATH):
+        """Écrit la trace au format Chrome Trace Event (chrome://tracing, Perfetto)"""
+        events = [
+            {"name": stage, "ph": "X", "pid": os.getpid(), "tid": thread,
+             "ts": (start - self.origin) * 1e6, "dur": duration * 1e6}
+            for stage, start, duration, thread in list(self.trace)]
+        with open(path, 'w') as trace_file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, trace_file)
+        print(f"Trace de profilage écrite dans {path}")
+        return path
+
+class ProfilerOverlay(Label):
+    """Incrustation des temps du profileur, par-dessus toute l'interface"""
+    
+    def __init__(self, profiler, **kwargs):
+        super().__init__(
+            font_size=dp(11),
+            font_name='RobotoMono-Regular',
+            halign='left',
+            valign='top',
+            size_hint=(None, None),
+            color=TEXT_COLOR,
+            **kwargs)
+        self.profiler = profiler
+        self.bind(texture_size=self.on_texture_size)
+        with self.canvas.before:
+            Color(0, 0, 0, 0.6)
+            self.background = Rectangle(pos=self.pos, size=self.size)
+        self.bind(pos=self.update_background, size=self.update_background)
+        self.refresh_event = Clock.schedule_interval(self.refresh, PROFILE_OVERLAY_INTERVAL)
+    
+    def on_texture_size(self, instance, size):
+        self.size = (size[0] + dp(10), size[1] + dp(10))
+        self.pos = (dp(5), Window.height - self.height - dp(5))
+    
+    def update_background(self, *args):
+        self.background.pos = self.pos
+        self.background.size = self.size
+    
+    def refresh(self, dt):
+        if self.parent:
+            self.text = self.profiler.report()
+
+class RingBuffer:
+    """Tampon circulaire de capacité fixe : ajout O(1), min/max incrémentaux
+    (files monotones) et vue contiguë sans copie des valeurs dans l'ordre"""
+    
+    def __init__(self, capacity):
+        self.capacity = capacity
+        # Chaque valeur est écrite deux fois pour que la fenêtre soit toujours contiguë
+        self.data = np.zeros(2 * capacity)
+        self.total = 0
+        self.min_queue = deque()  # (index, valeur) croissantes
+        self.max_queue = deque()  # (index, valeur) décroissantes
+    
+    def __len__(self):
+        return min(self.total, self.capacity)
+    
+    def __iter__(self):
+        return iter(self.view().tolist())
+    
+    def append(self, value):
+        index = self.total
+        pos = index % self.capacity
+        self.data[pos] = value
+        self.data[pos + self.capacity] = value
+        self.total += 1
+        
+        oldest = index - self.capacity
+        while self.min_queue and self.min_queue[-1][1] >= value:
+            self.min_queue.pop()
+        self.min_queue.append((index, value))
+        if self.min_queue[0][0] <= oldest:
+            self.min_queue.popleft()
+        while self.max_queue and self.max_queue[-1][1] <= value:
+            self.max_queue.pop()
+        self.max_queue.append((index, value))
+        if self.max_queue[0][0] <= oldest:
+            self.max_queue.popleft()
+    
+    def view(self):
+        """Valeurs de la plus ancienne à la plus récente (vue NumPy, sans copie)"""
+        count = len(self)
+        start = (self.total - count) % self.capacity
+        return self.data[start:start + count]
+    
+    def min(self):
+        return self.min_queue[0][1]
+    
+    def max(self):
+        return self.max_queue[0][1]
+    
+    def resize(self, capacity):
+        """Change la capacité en conservant les valeurs les plus récentes"""
+        values = self.view().tolist()
+        self.__init__(capacity)
+        self.reset(values)
+    
+    def reset(self, values=()):
+        """Remplace le contenu par les dernières valeurs fournies (capacité inchangée)"""
+        values = list(values)[-self.capacity:]
+        self.__init__(self.capacity)
+        for value in values:
+            self.append(value)
+
+class RingBufferPlot(MeshLinePlot):
+    """MeshLinePlot qui lit directement la vue d'un RingBuffer : pas de liste
+    de tuples, projection en pixels vectorisée"""
+    
+    def __init__(self, buffer=None, **kwargs):
+        super().__init__(**kwargs)
+        self.buffer = buffer
+    
+    def plot_mesh(self):
+        params = self.params
+        if self.buffer is None or params['xlog'] or params['ylog']:
+            return super().plot_mesh()
+        values = self.buffer.view()
+        mesh, vert, _ = self.set_mesh_size(len(values))
+        if not len(values):
+            return
+        x0, y0, x1, y1 = params['size']
+        ratio_x = (x1 - x0) / float((params['xmax'] - params['xmin']) or 1)
+        ratio_y = (y1 - y0) / float((params['ymax'] - params['ymin']) or 1)
+        vertices = np.zeros((len(values), 4))
+        vertices[:, 0] = (np.arange(len(values)) - params['xmin']) * ratio_x + x0
+        vertices[:, 1] = (values - params['ymin']) * ratio_y + y0
+        mesh.vertices = vertices.ravel().tolist()
+
 class RoundedButton(Button):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -237,35 +458,65 @@ class LoginScreen(Screen):
         self.manager.current = 'dashboard'
 
 class DashboardScreen(Screen):
-    def __init__(self, **kwargs):
+    def __init__(self, profiler=None, **kwargs):
         super().__init__(**kwargs)
         self.alert_sound = SoundLoader.load("alert.mp3")
-        self.alert_flashing = False
+        self.flash_event = None  # Unique minuterie de clignotement, active tant qu'une alerte l'est
         self.last_alert_time = 0
         self.data_update_event = None
         self.last_update_time = 0
         self.update_interval = 1  # Intervalle de mise à jour en secondes
         self.alert_popup = None  # Référence à la popup d'alerte actuelle
+        self.profiler = profiler or FrameProfiler()
+        self.api = ApiClient(profiler=self.profiler)
+        self.pending_fetch = None  # Requête de données en cours (mode interrogation)
+        self.use_stream = True  # Flux poussé par le serveur (SSE) plutôt que l'interrogation
+        self.stream_stop = None
+        self.render_fps = 10  # Fréquence max de rafraîchissement des graphiques
+        self.render_event = None
+        self.dirty_motors = set()  # Moteurs ayant reçu des données depuis le dernier rendu
         
-        # Configuration initiale
+        # Cache local : historique affiché dès le lancement, seul le delta est
+        # redemandé au serveur
+        self.cache = ReadingCache()
+        self.cache_pending = []  # Mesures reçues en direct, pas encore écrites dans le cache
+        self.live_readings = {}  # Dernières mesures reçues en direct, par moteur
+        self.last_timestamps = {}  # Horodatage de la dernière mesure en tampon, par moteur
+        # Le flux n'avance synced_until que s'il n'a pas été coupé depuis la
+        # dernière synchronisation terminée (sinon les mesures manquées seraient sautées)
+        self.stream_generation = 0
+        self.synced_generation = None
+        self.cache_flush_event = None
+        self.sync_event = None
+        self.pending_sync = None
+        
+        # Configuration initiale : la liste des moteurs vient du serveur,
+        # num_motors ne sert que si elle est indisponible
         self.num_motors = 4
+        self.max_open_tabs = 4  # Onglets de détail gardés en mémoire (LRU)
         self.data_history_length = 300
-        self.thresholds = [{'temp': 85, 'voltage_min': 200, 'voltage_max': 240} for _ in range(self.num_motors)]
-        self.alerts = {i: {'temp': False, 'voltage': False} for i in range(self.num_motors)}
+        self.motor_ids = []
+        self.thresholds = {}
+        self.alerts = {}
         
-        # Pré-allocation des données historiques
-        self.temp_data = [[] for _ in range(self.num_motors)]
-        self.voltage_data = [[] for _ in range(self.num_motors)]
+        # Données historiques (tampons circulaires), créées à la découverte d'un moteur
+        self.temp_data = {}
+        self.voltage_data = {}
         self.time_points = []
         
+        # Widgets construits à la demande
+        self.motor_tabs = OrderedDict()
+        self.motor_cards = {}
+        self.motor_graphs = {}
+        self.overview_tiles = {}
+        
         # Layout principal avec onglets
         self.tab_panel = TabbedPanel(do_default_tab=False)
         
-        # Créer un onglet pour chaque moteur
-        for i in range(self.num_motors):
-            tab = TabbedPanelItem(text=f'Moteur {i+1}')
-            tab.content = self.create_motor_tab(i)
-            self.tab_panel.add_widget(tab)
+        # Vue d'ensemble compacte de tous les moteurs
+        overview_tab = TabbedPanelItem(text="Vue d'ensemble")
+        overview_tab.content = self.create_overview_tab()
+        self.tab_panel.add_widget(overview_tab)
         
         # Ajouter un onglet pour l'export et la configuration
         config_tab = TabbedPanelItem(text='Configuration')
@@ -277,15 +528,128 @@ class DashboardScreen(Screen):
             Color(*BACKGROUND)
             self.rect = Rectangle(size=Window.size, pos=self.tab_panel.pos)
         
+        self.tab_panel.bind(current_tab=self.on_tab_switch)
         self.add_widget(self.tab_panel)
+        self.tab_panel.switch_to(overview_tab)
+    
+    def load_motors(self):
+        """Récupère la liste des moteurs connus du serveur"""
+        self.api.submit(
+            self.api.get_motors,
+            callback=lambda motor_ids: self.set_motors([motor_id - 1 for motor_id in motor_ids]),
+            errback=self.on_motors_error)
+    
+    def on_motors_error(self, error):
+        print(f"Erreur de connexion au serveur: {error}")
+        self.set_motors(range(self.num_motors))
+    
+    @mainthread
+    def set_motors(self, motor_ids):
+        for motor_id in motor_ids:
+            self.ensure_motor(motor_id)
+        self.sync_history()
+    
+    def ensure_motor(self, motor_id):
+        """Enregistre un moteur : tampons, seuils par défaut et tuile de la vue d'ensemble"""
+        if motor_id in self.temp_data:
+            return
+        self.temp_data[motor_id] = RingBuffer(self.data_history_length)
+        self.voltage_data[motor_id] = RingBuffer(self.data_history_length)
+        self.live_readings[motor_id] = deque(maxlen=self.data_history_length)
+        # Historique du dernier lancement, avant toute réponse du serveur ; lu
+        # sur le thread du client API pour ne pas bloquer l'interface
+        self.api.submit(
+            self.cache.recent, motor_id + 1, self.data_history_length,
+            callback=partial(self.on_cached_history, motor_id),
+            errback=self.on_cache_error)
+        self.thresholds[motor_id] = {'temp': 85, 'voltage_min': 200, 'voltage_max': 240}
+        self.alerts[motor_id] = set()
+        self.motor_ids = sorted(self.temp_data)
+        
+        tile = Button(
+            text=f"Moteur {motor_id+1}\n--",
+            halign='center',
+            background_normal='',
+            background_color=CARD_COLOR,
+            color=TEXT_COLOR,
+            size_hint_y=None,
+            height=dp(70))
+        tile.bind(on_press=lambda x: self.open_motor_tab(motor_id))
+        self.overview_tiles[motor_id] = tile
+        # Garder les tuiles dans l'ordre des identifiants
+        self.overview_grid.clear_widgets()
+        for known_id in self.motor_ids:
+            self.overview_grid.add_widget(self.overview_tiles[known_id])
+        self.export_spinner.values = [f'Moteur {known_id+1}' for known_id in self.motor_ids]
+    
+    def create_overview_tab(self):
+        scroll = ScrollView()
+        self.overview_grid = GridLayout(
+            cols=4, spacing=dp(10), padding=dp(15), size_hint_y=None)
+        self.overview_grid.bind(minimum_height=self.overview_grid.setter('height'))
+        scroll.add_widget(self.overview_grid)
+        return scroll
+    
+    def update_overview_tile(self, motor_id, temp, voltage):
+        tile = self.overview_tiles.get(motor_id)
+        if tile:
+            tile.text = f"Moteur {motor_id+1}\n{temp:.1f}°C  {voltage:.1f}V"
+            tile.background_color = ERROR_COLOR if self.alerts[motor_id] else CARD_COLOR
+    
+    def open_motor_tab(self, motor_id):
+        """Construit l'onglet de détail au premier affichage ; libère le plus ancien au-delà de max_open_tabs"""
+        tab = self.motor_tabs.get(motor_id)
+        if tab is None:
+            tab = TabbedPanelItem(text=f'Moteur {motor_id+1}')
+            tab.motor_id = motor_id
+            tab.content = self.create_motor_tab(motor_id)
+            self.tab_panel.add_widget(tab)
+            self.motor_tabs[motor_id] = tab
+            self.dirty_motors.add(motor_id)
+            while len(self.motor_tabs) > self.max_open_tabs:
+                self.close_motor_tab(next(iter(self.motor_tabs)))
+        else:
+            self.motor_tabs.move_to_end(motor_id)
+        self.tab_panel.switch_to(tab)
+    
+    def close_motor_tab(self, motor_id):
+        tab = self.motor_tabs.pop(motor_id)
+        self.tab_panel.remove_widget(tab)
+        # Les tampons sont conservés, seuls les widgets sont libérés
+        self.motor_cards.pop(motor_id, None)
+        self.motor_graphs.pop(motor_id, None)
     
     def start_data_update(self):
         """Démarrer la mise à jour des données"""
-        if self.data_update_event is None:
+        if not self.motor_ids:
+            self.load_motors()
+        if self.render_event is None:
+            self.render_event = Clock.schedule_interval(self.render_frame, 1 / self.render_fps)
+        if self.use_stream:
+            if self.stream_stop is None:
+                # Un Event par thread : un redémarrage ne réveille pas l'ancien
+                self.stream_stop = Event()
+                Thread(target=self.stream_data, args=(self.stream_stop,), daemon=True).start()
+        elif self.data_update_event is None:
             self.data_update_event = Clock.schedule_interval(self.update_data, self.update_interval)
+        if self.cache_flush_event is None:
+            self.cache_flush_event = Clock.schedule_interval(self.flush_cache, CACHE_FLUSH_INTERVAL)
+            self.sync_event = Clock.schedule_interval(self.sync_history, CACHE_SYNC_INTERVAL)
 
     def stop_data_update(self):
         """Arrêter la mise à jour des données"""
+        if self.render_event:
+            self.render_event.cancel()
+            self.render_event = None
+        if self.cache_flush_event:
+            self.cache_flush_event.cancel()
+            self.sync_event.cancel()
+            self.cache_flush_event = None
+            self.sync_event = None
+            self.flush_cache(0)
+        if self.stream_stop:
+            self.stream_stop.set()
+            self.stream_stop = None
         if self.data_update_event:
             self.data_update_event.cancel()
             self.data_update_event = None
@@ -311,10 +675,6 @@ class DashboardScreen(Screen):
         # Cartes de données
         cards_layout = BoxLayout(spacing=dp(15), padding=dp(15), size_hint_y=0.25)
     
-        # Stocker les cartes dans le dictionnaire
-        if not hasattr(self, 'motor_cards'):
-            self.motor_cards = {}
-    
         self.motor_cards[motor_id] = {
             'temp_card': self.create_data_card(
                 "Température", "N/A", f"Moteur {motor_id+1}", TEMP_COLOR, motor_id),
@@ -330,19 +690,17 @@ class DashboardScreen(Screen):
         # Graphiques
         graphs_layout = BoxLayout(spacing=dp(15), padding=dp(15))
     
-        # Stocker les graphiques dans le dictionnaire
-        if not hasattr(self, 'motor_graphs'):
-            self.motor_graphs = {}
-    
         self.motor_graphs[motor_id] = {
             'temp_graph': self.create_graph(
                 f"Température (°C) - Moteur {motor_id+1}", 
                 TEMP_COLOR,
-                motor_id),
+                motor_id,
+                self.temp_data[motor_id]),
             'voltage_graph': self.create_graph(
                 f"Tension (V) - Moteur {motor_id+1}", 
                 VOLTAGE_COLOR,
-                motor_id)
+                motor_id,
+                self.voltage_data[motor_id])
         }
     
         graphs_layout.add_widget(self.motor_graphs[motor_id]['temp_graph'])
@@ -384,7 +742,7 @@ class DashboardScreen(Screen):
     
         return card
     
-    def create_graph(self, title, color, motor_id):
+    def create_graph(self, title, color, motor_id, buffer):
         graph = Graph(
             xlabel='Temps',
             ylabel=title,
@@ -406,7 +764,7 @@ class DashboardScreen(Screen):
             label_options={'color': TEXT_COLOR},
             tick_color=[0.5, 0.5, 0.5, 1])
         
-        plot = MeshLinePlot(color=color)
+        plot = RingBufferPlot(buffer=buffer, color=color)
         graph.add_plot(plot)
         return graph
     
@@ -426,22 +784,21 @@ class DashboardScreen(Screen):
         # Sélecteur de moteur pour l'export
         motor_spinner = Spinner(
             text='Sélectionner un moteur',
-            values=[f'Moteur {i+1}' for i in range(self.num_motors)],
+            values=[],
             size_hint_y=None,
             height=dp(50))
+        self.export_spinner = motor_spinner
         
         # Format d'export
         format_spinner = Spinner(
             text='CSV',
-            values=['CSV', 'TXT'],
+            values=['CSV', 'TXT', 'Parquet'],
             size_hint_y=None,
             height=dp(50))
         
         # Bouton d'export
         export_btn = RoundedButton(text="Exporter les données", size_hint_y=None, height=dp(50))
-        export_btn.bind(on_press=lambda x: self.export_data(
-            motor_spinner.values.index(motor_spinner.text),
-            format_spinner.text))
+        export_btn.bind(on_press=lambda x: self.export_selected(motor_spinner, format_spinner))
         
         export_layout.add_widget(motor_spinner)
         export_layout.add_widget(format_spinner)
@@ -479,108 +836,244 @@ class DashboardScreen(Screen):
         
         return layout
     
+    def export_selected(self, motor_spinner, format_spinner):
+        if motor_spinner.text in motor_spinner.values:
+            motor_id = self.motor_ids[motor_spinner.values.index(motor_spinner.text)]
+            self.export_data(motor_id, format_spinner.text)
+    
     def show_threshold_popup(self, motor_id):
-        try:
-            response = requests.get(f"http://localhost:8000/api/thresholds/{motor_id + 1}")
-            if response.status_code == 200:
-                thresholds = response.json()
-                current_thresholds = {
-                    'temp': thresholds['temp_max'],
-                    'voltage_min': thresholds['voltage_min'],
-                    'voltage_max': thresholds['voltage_max']
-                }
-                
-                popup = ThresholdPopup(
-                    motor_id=motor_id,
-                    current_thresholds=current_thresholds,
-                    callback=lambda th: self.update_thresholds(motor_id, th))
-                popup.open()
-        except requests.exceptions.RequestException as e:
-            print(f"Erreur de connexion au serveur: {e}")
+        self.api.submit(
+            self.api.get_thresholds, motor_id + 1,
+            callback=partial(self.open_threshold_popup, motor_id),
+            errback=self.on_api_error)
+    
+    @mainthread
+    def open_threshold_popup(self, motor_id, thresholds):
+        if thresholds is None:
+            return
+        current_thresholds = {
+            'temp': thresholds['temp_max'],
+            'voltage_min': thresholds['voltage_min'],
+            'voltage_max': thresholds['voltage_max']
+        }
+        
+        popup = ThresholdPopup(
+            motor_id=motor_id,
+            current_thresholds=current_thresholds,
+            callback=lambda th: self.update_thresholds(motor_id, th))
+        popup.open()
     
     def update_thresholds(self, motor_id, thresholds):
-        try:
-            response = requests.post(
-                f"http://localhost:8000/api/thresholds/",
-                json={
-                    "motor_id": motor_id + 1,
-                    "temp_max": thresholds['temp'],
-                    "voltage_min": thresholds['voltage_min'],
-                    "voltage_max": thresholds['voltage_max']
-                })
-            if response.status_code == 200:
-                print(f"Nouveaux seuils enregistrés pour le moteur {motor_id + 1}")
-        except requests.exceptions.RequestException as e:
-            print(f"Erreur de connexion au serveur: {e}")
+        self.api.submit(
+            self.api.update_thresholds,
+            motor_id + 1, thresholds['temp'], thresholds['voltage_min'], thresholds['voltage_max'],
+            callback=lambda result: print(f"Nouveaux seuils enregistrés pour le moteur {motor_id + 1}"),
+            errback=self.on_api_error)
+    
+    def on_api_error(self, error):
+        print(f"Erreur de connexion au serveur: {error}")
     
     def update_data(self, dt):
         current_time = time.time()
         if current_time - self.last_update_time < self.update_interval:
             return
         
+        # Ne pas empiler les requêtes si le serveur répond lentement
+        if self.pending_fetch and not self.pending_fetch.done():
+            return
+        if not self.motor_ids:
+            return
+        
         self.last_update_time = current_time
         
-        # Utiliser un thread séparé pour les requêtes API
-        Thread(target=self.fetch_and_update_data, daemon=True).start()
+        # Une seule requête pour la dernière mesure de tous les moteurs,
+        # exécutée sur le thread du client API
+        self.pending_fetch = self.api.submit(
+            self.api.get_latest, [motor_id + 1 for motor_id in self.motor_ids],
+            callback=self.on_latest_data,
+            errback=self.on_api_error)
     
-    def fetch_and_update_data(self):
-        try:
-            for motor_id in range(self.num_motors):
-                # Récupérer les données historiques pour chaque moteur
-                response = requests.get(f"http://localhost:8000/api/data/{motor_id + 1}/history?limit=1")
-                if response.status_code == 200:
-                    data = response.json()
-                    if data:  # Vérifier si des données sont disponibles
-                        latest_data = data[0]
-                        self.update_ui_with_data(motor_id, latest_data)
-        except requests.exceptions.RequestException as e:
-            print(f"Erreur de connexion au serveur: {e}")
+    def on_latest_data(self, readings):
+        for latest_data in readings:
+            self.update_ui_with_data(latest_data['motor_id'] - 1, latest_data)
+    
+    def stream_data(self, stop):
+        """Reçoit les mesures poussées par le serveur, avec reconnexion automatique"""
+        retry_delay = 1
+        while not stop.is_set():
+            # Les mesures manquées pendant une coupure sont reprises de l'historique
+            self.stream_generation += 1
+            self.sync_history()
+            try:
+                # Tous les moteurs : un moteur inconnu apparaît à sa première mesure
+                for event, data in self.api.stream_events(stop):
+                    retry_delay = 1
+                    if event == "reading":
+                        self.update_ui_with_data(data['motor_id'] - 1, data)
+                    elif event == "alert" and 'state' in data:
+                        self.on_alert_transition(data)
+            except (requests.exceptions.RequestException, ValueError) as e:
+                print(f"Flux interrompu, reconnexion dans {retry_delay}s: {e}")
+            stop.wait(retry_delay)
+            retry_delay = min(retry_delay * 2, 30)
     
     @mainthread
     def update_ui_with_data(self, motor_id, latest_data):
-        # Mise à jour des données
-        self.temp_data[motor_id].append(latest_data['temperature'])
-        self.voltage_data[motor_id].append(latest_data['voltage'])
-        
-        # Vérifier les alertes
-        temp_alert = latest_data['temperature'] > self.thresholds[motor_id]['temp']
-        voltage_alert = (latest_data['voltage'] < self.thresholds[motor_id]['voltage_min'] or 
-                        latest_data['voltage'] > self.thresholds[motor_id]['voltage_max'])
-        
-        # Mise à jour des états d'alerte
-        self.alerts[motor_id]['temp'] = temp_alert
-        self.alerts[motor_id]['voltage'] = voltage_alert
-        
-        # Déclencher ou arrêter les alertes
-        if temp_alert or voltage_alert:
-            if not self.alert_popup:  # Si aucune alerte n'est déjà active
-                self.trigger_alert(motor_id)
+        with self.profiler.measure('update'):
+            self.apply_reading(motor_id, latest_data)
+    
+    def apply_reading(self, motor_id, latest_data):
+        self.ensure_motor(motor_id)
+        
+        # Mise à jour des données. Le serveur renvoie la dernière mesure de chaque
+        # moteur à chaque (re)connexion du flux, et l'interrogation la même tant
+        # qu'il n'y en a pas de nouvelle : seules les mesures plus récentes sont ajoutées
+        timestamp = latest_data.get('timestamp')
+        if timestamp:
+            timestamp = normalize_timestamp(timestamp)
+            last = self.last_timestamps.get(motor_id)
+            if last is None or timestamp > last:
+                self.last_timestamps[motor_id] = timestamp
+                self.temp_data[motor_id].append(latest_data['temperature'])
+                self.voltage_data[motor_id].append(latest_data['voltage'])
+                reading = {
+                    'motor_id': motor_id + 1,
+                    'temperature': latest_data['temperature'],
+                    'voltage': latest_data['voltage'],
+                    'timestamp': timestamp}
+                self.cache_pending.append(reading)
+                self.live_readings[motor_id].append(reading)
         else:
-            self.stop_alert()  # Ferme automatiquement la popup si les valeurs sont normales
+            self.temp_data[motor_id].append(latest_data['temperature'])
+            self.voltage_data[motor_id].append(latest_data['voltage'])
+        
+        # Alertes actives telles qu'évaluées par le serveur : seules les
+        # différences avec l'état connu déclenchent ou arrêtent une alerte
+        active = set(latest_data.get('alerts', ()))
+        for alert_type in active - self.alerts[motor_id]:
+            self.apply_alert_transition(motor_id, alert_type, 'open')
+        for alert_type in self.alerts[motor_id] - active:
+            self.apply_alert_transition(motor_id, alert_type, 'cleared')
         
         # Mise à jour de l'interface
         self.update_data_card(motor_id, latest_data['temperature'], latest_data['voltage'])
-        self.update_graphs(motor_id)
-        
-        # Garder seulement les N dernières valeurs
-        if len(self.temp_data[motor_id]) > self.data_history_length:
-            self.temp_data[motor_id] = self.temp_data[motor_id][-self.data_history_length:]
-            self.voltage_data[motor_id] = self.voltage_data[motor_id][-self.data_history_length:]
+        self.update_overview_tile(motor_id, latest_data['temperature'], latest_data['voltage'])
+        # Le graphique sera redessiné au prochain rendu, si son onglet est visible
+        self.dirty_motors.add(motor_id)
+    
+    def flush_cache(self, dt):
+        """Écrit les mesures reçues en direct dans le cache, sur le thread du client API"""
+        if self.cache_pending:
+            readings, self.cache_pending = self.cache_pending, []
+            # L'interrogation ne voit que la dernière mesure : elle n'avance pas synced_until
+            synced = self.use_stream and self.synced_generation == self.stream_generation
+            self.api.submit(self.cache.add_readings, readings, synced, errback=self.on_cache_error)
+    
+    @mainthread
+    def sync_history(self, *args):
+        """Demande au serveur les mesures postérieures à celles déjà en cache"""
+        if not self.motor_ids or (self.pending_sync and not self.pending_sync.done()):
+            return
+        self.pending_sync = self.api.submit(
+            self.fetch_history_delta,
+            [motor_id + 1 for motor_id in self.motor_ids], self.data_history_length, self.stream_generation,
+            callback=self.on_history_synced,
+            errback=self.on_api_error)
+    
+    def fetch_history_delta(self, motor_ids, limit, generation):
+        """Thread du client API : complète le cache et retourne, pour les moteurs
+        qui ont reçu des mesures, les limit dernières mesures en cache"""
+        updated = {}
+        for motor_id in motor_ids:
+            # Au plus limit mesures : au-delà, le tampon ne les afficherait pas
+            records = self.api.get_history(motor_id, limit, since=self.cache.synced_until(motor_id))
+            if not records:
+                continue
+            self.cache.add_readings(records)
+            self.cache.set_synced_until(motor_id, records[0]['timestamp'])
+            self.cache.prune(motor_id)
+            updated[motor_id - 1] = self.cache.recent(motor_id, limit)
+        return generation, updated
+    
+    @mainthread
+    def on_history_synced(self, result):
+        generation, updated = result
+        self.synced_generation = generation
+        for motor_id, rows in updated.items():
+            if motor_id in self.temp_data:
+                self.load_cached_history(motor_id, rows)
+    
+    @mainthread
+    def on_cached_history(self, motor_id, rows):
+        self.load_cached_history(motor_id, rows)
+    
+    def load_cached_history(self, motor_id, rows):
+        """Remplit les tampons avec l'historique en cache suivi des mesures
+        reçues en direct depuis sa lecture"""
+        if not rows:
+            return
+        last = rows[-1]['timestamp']
+        rows = rows + [reading for reading in self.live_readings[motor_id] if reading['timestamp'] > last]
+        self.last_timestamps[motor_id] = rows[-1]['timestamp']
+        self.temp_data[motor_id].reset(row['temperature'] for row in rows)
+        self.voltage_data[motor_id].reset(row['voltage'] for row in rows)
+        self.dirty_motors.add(motor_id)
+    
+    def on_cache_error(self, error):
+        print(f"Erreur du cache local: {error}")
+    
+    def visible_motor(self):
+        return getattr(self.tab_panel.current_tab, 'motor_id', None)
+    
+    def on_tab_switch(self, panel, tab):
+        # Les données reçues pendant que l'onglet était caché sont déjà marquées
+        motor_id = getattr(tab, 'motor_id', None)
+        if motor_id is not None and motor_id in self.dirty_motors:
+            self.render_frame(0)
+    
+    def render_frame(self, dt):
+        """Redessine au plus une fois par image le seul moteur visible, s'il a changé"""
+        motor_id = self.visible_motor()
+        if motor_id in self.dirty_motors:
+            self.dirty_motors.discard(motor_id)
+            with self.profiler.measure('graphs'):
+                self.update_graphs(motor_id)
     
     def update_graphs(self, motor_id):
-        # Mise à jour du graphique température
-        if len(self.temp_data[motor_id]) > 0:
-            temp_plot = self.motor_graphs[motor_id]['temp_graph'].plots[0]
-            temp_plot.points = [(i, val) for i, val in enumerate(self.temp_data[motor_id])]
-            self.motor_graphs[motor_id]['temp_graph'].ymax = max(self.temp_data[motor_id]) * 1.1
-            self.motor_graphs[motor_id]['temp_graph'].ymin = min(self.temp_data[motor_id]) * 0.9
-        
-        # Mise à jour du graphique tension
-        if len(self.voltage_data[motor_id]) > 0:
-            voltage_plot = self.motor_graphs[motor_id]['voltage_graph'].plots[0]
-            voltage_plot.points = [(i, val) for i, val in enumerate(self.voltage_data[motor_id])]
-            self.motor_graphs[motor_id]['voltage_graph'].ymax = max(self.voltage_data[motor_id]) * 1.1
-            self.motor_graphs[motor_id]['voltage_graph'].ymin = min(self.voltage_data[motor_id]) * 0.9
+        # Les tracés lisent directement les tampons : il suffit de redessiner
+        for key, buffer in (('temp_graph', self.temp_data[motor_id]),
+                            ('voltage_graph', self.voltage_data[motor_id])):
+            if len(buffer) > 0:
+                graph = self.motor_graphs[motor_id][key]
+                graph.plots[0].ask_draw()
+                self.update_axis(graph, buffer.min() * 0.9, buffer.max() * 1.1)
+    
+    def update_axis(self, graph, ymin, ymax):
+        """Hystérésis : les bornes ne changent (relayout complet du Graph) que si
+        les données sortent du cadre ou n'en occupent plus qu'une petite partie"""
+        span = ymax - ymin
+        current_span = graph.ymax - graph.ymin
+        if ymin < graph.ymin or ymax > graph.ymax or current_span > 2 * span:
+            graph.ymin, graph.ymax = ymin, ymax
+    
+    @mainthread
+    def on_alert_transition(self, alert):
+        self.ensure_motor(alert['motor_id'] - 1)
+        self.apply_alert_transition(alert['motor_id'] - 1, alert['alert_type'], alert['state'])
+    
+    def apply_alert_transition(self, motor_id, alert_type, state):
+        """Applique une transition d'alerte (open, acknowledged, cleared) ; sans
+        effet si elle est déjà connue (flux et mesures portent la même information)"""
+        alerts = self.alerts[motor_id]
+        if state == 'open' and alert_type not in alerts:
+            alerts.add(alert_type)
+            self.trigger_alert(motor_id)
+        elif state == 'acknowledged' and self.alert_sound:
+            self.alert_sound.stop()
+        elif state == 'cleared' and alert_type in alerts:
+            alerts.discard(alert_type)
+            self.reset_cards(motor_id)
+            self.stop_alert()  # Ferme automatiquement la popup si les valeurs sont normales
     
     def trigger_alert(self, motor_id):
         """Déclenche une alerte visuelle et sonore"""
@@ -588,36 +1081,55 @@ class DashboardScreen(Screen):
         if self.alert_sound:
             self.alert_sound.play()
     
-        # Faire clignoter les cartes du moteur concerné
-        self.alert_flashing = True
-        Clock.schedule_interval(partial(self.flash_alert, motor_id), 0.5)
+        # Faire clignoter les cartes des moteurs en alerte
+        if self.flash_event is None:
+            self.flash_event = Clock.schedule_interval(self.flash_alert, 0.5)
     
         # Afficher une notification
-        self.show_alert_notification(motor_id)
+        if not self.alert_popup:  # Si aucune alerte n'est déjà affichée
+            self.show_alert_notification(motor_id)
 
-    def flash_alert(self, motor_id, dt):
-        """Fait clignoter les cartes du moteur en alerte"""
-        if not self.alert_flashing:
-            return False  # Retourne False pour arrêter le schedule
+    def flash_alert(self, dt):
+        """Fait clignoter les cartes des moteurs en alerte"""
+        with self.profiler.measure('canvas'):
+            self.draw_alert_cards()
     
-        motor_cards = self.motor_cards.get(motor_id, {})
-        for card in motor_cards.values():
-            card.canvas.before.clear()
-            with card.canvas.before:
-                if random.random() > 0.5:  # Effet de clignotement aléatoire
-                    Color(*ERROR_COLOR)
-                else:
+    def draw_alert_cards(self):
+        for motor_id, alerts in self.alerts.items():
+            if not alerts:
+                continue
+            for card in self.motor_cards.get(motor_id, {}).values():
+                card.canvas.before.clear()
+                with card.canvas.before:
+                    if random.random() > 0.5:  # Effet de clignotement aléatoire
+                        Color(*ERROR_COLOR)
+                    else:
+                        Color(*CARD_COLOR)
+                    RoundedRectangle(pos=card.pos, size=card.size, radius=[dp(10)])
+    
+    def reset_cards(self, motor_id):
+        with self.profiler.measure('canvas'):
+            for card in self.motor_cards.get(motor_id, {}).values():
+                card.canvas.before.clear()
+                with card.canvas.before:
                     Color(*CARD_COLOR)
-                RoundedRectangle(pos=card.pos, size=card.size, radius=[dp(10)])
-        return True
+                    RoundedRectangle(pos=card.pos, size=card.size, radius=[dp(10)])
+    
+    def acknowledge_alert(self, motor_id):
+        """Acquitte les alertes du moteur : coupe le son et ferme la popup,
+        le clignotement continue jusqu'au retour à la normale"""
+        self.api.submit(self.api.acknowledge_alerts, motor_id + 1, errback=self.on_api_error)
+        if self.alert_sound:
+            self.alert_sound.stop()
+        if self.alert_popup:
+            self.alert_popup.dismiss()
+            self.alert_popup = None
 
     def show_alert_notification(self, motor_id):
         """Affiche une popup d'alerte qui se fermera automatiquement lorsque les valeurs reviendront à la normale"""
-        alerts = []
-        if self.alerts[motor_id]['temp']:
-            alerts.append(f"Température trop élevée (> {self.thresholds[motor_id]['temp']}°C)")
-        if self.alerts[motor_id]['voltage']:
-            alerts.append(f"Tension hors limites (< {self.thresholds[motor_id]['voltage_min']}V ou > {self.thresholds[motor_id]['voltage_max']}V)")
+        alerts = [
+            ALERT_MESSAGES.get(alert_type, alert_type).format(**self.thresholds[motor_id])
+            for alert_type in sorted(self.alerts[motor_id])]
     
         if alerts:
             content = BoxLayout(orientation='vertical', padding=dp(20), spacing=dp(15))
@@ -638,6 +1150,10 @@ class DashboardScreen(Screen):
         
             content.add_widget(Label(text="Cette alerte se fermera automatiquement lorsque les valeurs reviendront à la normale", 
                                   font_size=dp(14), color=get_color_from_hex("#AAAAAA")))
+            
+            ack_btn = RoundedButton(text="Acquitter", size_hint_y=None, height=dp(45))
+            ack_btn.bind(on_press=lambda x: self.acknowledge_alert(motor_id))
+            content.add_widget(ack_btn)
         
             self.alert_popup = Popup(title='',
                         content=content,
@@ -647,8 +1163,10 @@ class DashboardScreen(Screen):
 
     def stop_alert(self):
         """Arrête toutes les alertes en cours et ferme la popup si elle existe"""
-        if not any(alert['temp'] or alert['voltage'] for alert in self.alerts.values()):
-            self.alert_flashing = False
+        if not any(self.alerts.values()):
+            if self.flash_event is not None:
+                self.flash_event.cancel()
+                self.flash_event = None
             if self.alert_sound:
                 self.alert_sound.stop()
             
@@ -658,13 +1176,8 @@ class DashboardScreen(Screen):
                 self.alert_popup = None
             
             # Réinitialiser l'apparence des cartes
-            for motor_id in range(self.num_motors):
-                cards = self.motor_cards.get(motor_id, {})
-                for card in cards.values():
-                    card.canvas.before.clear()
-                    with card.canvas.before:
-                        Color(*CARD_COLOR)
-                        RoundedRectangle(pos=card.pos, size=card.size, radius=[dp(10)])
+            for motor_id in self.motor_cards:
+                self.reset_cards(motor_id)
     
     def update_data_card(self, motor_id, temp, voltage):
         # Récupérer les cartes pour ce moteur
@@ -678,12 +1191,20 @@ class DashboardScreen(Screen):
         motor_cards['voltage_card'].value_label.text = f"{voltage:.1f}V"
     
         # Mise à jour des indicateurs d'alerte
-        motor_cards['temp_card'].alert_icon.opacity = 1 if self.alerts[motor_id]['temp'] else 0
-        motor_cards['voltage_card'].alert_icon.opacity = 1 if self.alerts[motor_id]['voltage'] else 0
+        motor_cards['temp_card'].alert_icon.opacity = 1 if self.alerts[motor_id] & TEMP_ALERTS else 0
+        motor_cards['voltage_card'].alert_icon.opacity = 1 if self.alerts[motor_id] & VOLTAGE_ALERTS else 0
     
     def export_data(self, motor_id, format):
         filename = f"moteur_{motor_id+1}_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
         
+        if format == 'Parquet':
+            # Historique complet depuis le serveur, horodaté et sans perte de précision
+            self.api.submit(
+                self.api.download_export, motor_id + 1, "parquet", filename + ".parquet",
+                callback=lambda path: print(f"Données exportées vers {path}"),
+                errback=self.on_api_error)
+            return
+        
         if format == 'CSV':
             filename += ".csv"
             with open(filename, 'w', newline='') as csvfile:
@@ -702,8 +1223,15 @@ class DashboardScreen(Screen):
     
     def save_config(self, instance):
         try:
-            minutes = int(self.history_input.text)
+            minutes = max(int(self.history_input.text), 1)
             self.data_history_length = minutes * 60
+            for buffer in list(self.temp_data.values()) + list(self.voltage_data.values()):
+                buffer.resize(self.data_history_length)
+            for motor_id, readings in self.live_readings.items():
+                self.live_readings[motor_id] = deque(readings, maxlen=self.data_history_length)
+            for graphs in self.motor_graphs.values():
+                for graph in graphs.values():
+                    graph.xmax = self.data_history_length
             print(f"Configuration sauvegardée: historique = {minutes} minutes")
         
             # Redémarrer les mises à jour si elles étaient actives
@@ -719,14 +1247,43 @@ class DashboardScreen(Screen):
         self.manager.current = 'login'
 
 class MotorDashboardApp(App):
+    def on_stop(self):
+        dashboard = self.root.get_screen('dashboard')
+        dashboard.stop_data_update()
+        dashboard.api.close()
+        if self.profiler.enabled:
+            self.profiler.stop()
+            self.profiler.dump()
+    
     def build(self):
         Window.clearcolor = BACKGROUND
         
+        # Profilage optionnel : incrustation et trace (voir PROFILE_ENABLED)
+        self.profiler = FrameProfiler(enabled=PROFILE_ENABLED)
+        self.profiler_overlay = None
+        if self.profiler.enabled:
+            self.profiler.start()
+            self.profiler_overlay = ProfilerOverlay(self.profiler)
+            Window.add_widget(self.profiler_overlay)
+            Window.bind(on_key_down=self.on_profiler_key)
+        
         sm = ScreenManager()
         sm.add_widget(LoginScreen(name='login'))
-        sm.add_widget(DashboardScreen(name='dashboard'))
+        sm.add_widget(DashboardScreen(name='dashboard', profiler=self.profiler))
         
         return sm
+    
+    def on_profiler_key(self, window, key, scancode, codepoint, modifiers):
+        if key == 293:  # F12 : afficher / masquer l'incrustation
+            if self.profiler_overlay.parent:
+                Window.remove_widget(self.profiler_overlay)
+            else:
+                Window.add_widget(self.profiler_overlay)
+            return True
+        if key == 292:  # F11 : écrire la trace sans quitter
+            self.profiler.dump()
+            return True
+        return False
 
 if __name__ == '__main__':
     MotorDashboardApp().run()
\ No newline at end of file
@@ -0,0 +1,31 @@
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+
+import httpx
+import pytest
+
+# Configuration lue à l'import du serveur : base SQLite temporaire, comme benchmark.py
+DATA_DIR = tempfile.mkdtemp(prefix="ams-tests-")
+atexit.register(shutil.rmtree, DATA_DIR, ignore_errors=True)
+os.environ["STORAGE_BACKEND"] = "sqlite"
+os.environ["SQLITE_PATH"] = os.path.join(DATA_DIR, "thermocouple.db")
+os.environ["ARCHIVE_DIR"] = os.path.join(DATA_DIR, "archive")
+os.environ["INGEST_WRITE_BEHIND"] = "false"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import server  # noqa: E402
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+@pytest.fixture
+async def client():
+    """Application chargée dans le processus de test, sans réseau"""
+    async with server.lifespan(server.app):
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            yield client
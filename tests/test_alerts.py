@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+import server
+
+THRESHOLDS = {"motor_id": 1, "temp_max": 80.0, "voltage_min": 200.0, "voltage_max": 240.0}
+
+def readings(n, seed=0):
+    """Série qui franchit les seuils dans les deux sens, avec des sauts rapides"""
+    rng = np.random.default_rng(seed)
+    temps = 70 + 15 * np.sin(np.arange(n) / 7) + rng.normal(0, 2, n)
+    volts = 220 + 25 * np.sin(np.arange(n) / 11) + rng.normal(0, 3, n)
+    temps[n // 2:n // 2 + 3] += 40
+    start = datetime(2026, 1, 1)
+    timestamps = [start + timedelta(seconds=i) for i in range(n)]
+    return timestamps, temps, volts
+
+def chunks(n, sizes):
+    start = 0
+    for size in sizes:
+        yield slice(start, min(start + size, n))
+        start += size
+        if start >= n:
+            return
+    yield slice(start, n)
+
+@pytest.mark.parametrize("thresholds", [THRESHOLDS, None])
+def test_evaluate_batch_matches_evaluate(thresholds):
+    timestamps, temps, volts = readings(300)
+    single = server.AlertEngine()
+    expected = [
+        single.evaluate(1, thresholds, ts, temp, volt)
+        for ts, temp, volt in zip(timestamps, temps.tolist(), volts.tolist())]
+
+    batch = server.AlertEngine()
+    active, transitions = [], []
+    # Lots de tailles variées : l'état doit passer correctement d'un lot à l'autre
+    for part in chunks(len(temps), [1, 2, 5, 50, 7, 100]):
+        lot_active, lot_transitions = batch.evaluate_batch(
+            1, thresholds, timestamps[part], temps[part], volts[part])
+        active += lot_active
+        transitions += lot_transitions
+
+    assert active == [result[0] for result in expected]
+    assert transitions == [result[1] for result in expected]
+    assert batch.active_alerts(1) == single.active_alerts(1)
+    if thresholds:
+        assert any(transitions), "la série doit déclencher des alertes"
+
+def test_evaluate_batch_keeps_restored_alerts():
+    engine = server.AlertEngine()
+    engine.restore(1, ["HIGH_TEMP"])
+    timestamps, temps, volts = readings(3)
+    active, transitions = engine.evaluate_batch(
+        1, THRESHOLDS, timestamps, np.full(3, 79.0), np.full(3, 220.0))
+    # 79 °C : sous le seuil mais dans l'hystérésis, l'alerte reste ouverte
+    assert active == [["HIGH_TEMP"]] * 3
+    assert transitions == [[], [], []]
+
+def test_update_batch_matches_update():
+    rng = np.random.default_rng(1)
+    temps = 60 + rng.normal(0, 1, 500)
+    volts = 220 + rng.normal(0, 2, 500)
+    temps[[100, 250, 400]] += 20
+    volts[[150, 300]] -= 30
+    single = server.AnomalyDetector(warmup=20)
+    expected = [single.update(1, temp, volt) for temp, volt in zip(temps.tolist(), volts.tolist())]
+
+    batch = server.AnomalyDetector(warmup=20)
+    results = []
+    for part in chunks(len(temps), [1, 3, 40, 200]):
+        results += batch.update_batch(1, temps[part], volts[part])
+
+    assert [[alert_type for alert_type, _ in flags] for flags in results] == \
+        [[alert_type for alert_type, _ in flags] for flags in expected]
+    for flags, expected_flags in zip(results, expected):
+        assert [z for _, z in flags] == pytest.approx([z for _, z in expected_flags])
+    assert batch.state[batch.rows[1]] == pytest.approx(single.state[single.rows[1]])
+    assert sum(len(flags) for flags in results) >= 5, "les sauts doivent être signalés"
@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+import server
+
+pytestmark = pytest.mark.anyio
+
+PACKED_HEADERS = {"content-type": "application/octet-stream"}
+EPOCH = datetime(1970, 1, 1)
+
+def packed(motor_ids, timestamps, temps, volts):
+    data = np.zeros(len(motor_ids), server.PACKED_READING_DTYPE)
+    data["motor_id"] = motor_ids
+    data["timestamp"] = timestamps
+    data["temperature"] = temps
+    data["voltage"] = volts
+    return data.tobytes()
+
+def micros(timestamp):
+    return (timestamp - EPOCH) // timedelta(microseconds=1)
+
+async def test_packed_batch_matches_json(client):
+    await client.post("/api/thresholds/", json={
+        "motor_id": 201, "temp_max": 80.0, "voltage_min": 200.0, "voltage_max": 240.0})
+    await client.post("/api/thresholds/", json={
+        "motor_id": 202, "temp_max": 80.0, "voltage_min": 200.0, "voltage_max": 240.0})
+    start = datetime(2026, 1, 1)
+    timestamps = [start + timedelta(seconds=i) for i in range(20)]
+    # Valeurs exactes en float32, comme le format binaire
+    temps = [70.0 + 2.5 * i for i in range(20)]
+    volts = [220.0 + 0.25 * i for i in range(20)]
+
+    response = await client.post("/api/data/batch", json=[
+        {"motor_id": 201, "temperature": t, "voltage": v, "timestamp": ts.isoformat()}
+        for ts, t, v in zip(timestamps, temps, volts)])
+    assert response.status_code == 200
+    by_json = response.json()["motors"][0]
+    response = await client.post(
+        "/api/data/batch",
+        content=packed([202] * 20, [micros(ts) for ts in timestamps], temps, volts),
+        headers=PACKED_HEADERS)
+    assert response.status_code == 200
+    by_packed = response.json()["motors"][0]
+
+    assert by_packed["count"] == by_json["count"] == 20
+    assert by_packed["active"] == by_json["active"]
+    assert by_packed["alerts"] == by_json["alerts"]
+    assert by_packed["alerts"], "la série doit ouvrir une alerte"
+
+    def columns(rows):
+        return [(row["timestamp"], row["temperature"], row["voltage"]) for row in rows]
+    json_rows = (await client.get("/api/data/201/history", params={"limit": 50})).json()
+    packed_rows = (await client.get("/api/data/202/history", params={"limit": 50})).json()
+    assert columns(packed_rows) == columns(json_rows)
+
+@pytest.mark.parametrize("timestamp", [2 ** 62, -2 ** 62, micros(datetime.max) + 1])
+async def test_packed_timestamp_out_of_range(client, timestamp):
+    response = await client.post(
+        "/api/data/batch", content=packed([203], [timestamp], [60.0], [220.0]), headers=PACKED_HEADERS)
+    assert response.status_code == 422
+
+async def test_packed_rejects_malformed_body(client):
+    body = packed([204], [0], [60.0], [220.0])
+    response = await client.post("/api/data/batch", content=body[:-1], headers=PACKED_HEADERS)
+    assert response.status_code == 400
+    response = await client.post(
+        "/api/data/batch", content=packed([204], [0], [float("nan")], [220.0]), headers=PACKED_HEADERS)
+    assert response.status_code == 422
+
+async def test_packed_zero_timestamp_is_receive_time(client):
+    before = datetime.now()
+    response = await client.post(
+        "/api/data/batch", content=packed([205], [0], [60.0], [220.0]), headers=PACKED_HEADERS)
+    await client.post("/api/data/", json={"motor_id": 205, "temperature": 61.0, "voltage": 220.0})
+    after = datetime.now()
+    assert response.status_code == 200
+    rows = (await client.get("/api/data/205/history")).json()
+    # Même base de temps que le chemin JSON : l'ordre d'arrivée est conservé
+    assert [row["temperature"] for row in rows] == [61.0, 60.0]
+    assert before <= datetime.fromisoformat(rows[1]["timestamp"]) <= datetime.fromisoformat(rows[0]["timestamp"]) <= after
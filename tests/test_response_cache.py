@@ -0,0 +1,72 @@
+import pytest
+
+import server
+
+pytestmark = pytest.mark.anyio
+
+async def test_history_not_modified_until_ingest(client):
+    await client.post("/api/data/", json={"motor_id": 301, "temperature": 60.0, "voltage": 220.0})
+    response = await client.get("/api/data/301/history", params={"limit": 10})
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert response.headers["last-modified"]
+
+    response = await client.get("/api/data/301/history", params={"limit": 10}, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+    # ETag faible ou liste d'ETags : même comparaison
+    response = await client.get(
+        "/api/data/301/history", params={"limit": 10}, headers={"If-None-Match": f'"other", W/{etag}'})
+    assert response.status_code == 304
+
+    await client.post("/api/data/", json={"motor_id": 301, "temperature": 61.0, "voltage": 220.0})
+    response = await client.get("/api/data/301/history", params={"limit": 10}, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert len(response.json()) == 2
+
+async def test_history_hit_does_not_query_storage(client, monkeypatch):
+    await client.post("/api/data/", json={"motor_id": 302, "temperature": 60.0, "voltage": 220.0})
+    first = await client.get("/api/data/302/history", params={"limit": 5})
+
+    async def unavailable(*args):
+        raise AssertionError("réponse attendue depuis le cache")
+    monkeypatch.setattr(server.storage, "history", unavailable)
+    response = await client.get("/api/data/302/history", params={"limit": 5})
+    assert response.status_code == 200
+    assert response.content == first.content
+    response = await client.get(
+        "/api/data/302/history", params={"limit": 5}, headers={"If-None-Match": first.headers["etag"]})
+    assert response.status_code == 304
+
+async def test_ingest_invalidates_only_its_motor(client):
+    for motor_id in (303, 304):
+        await client.post("/api/data/", json={"motor_id": motor_id, "temperature": 60.0, "voltage": 220.0})
+    etags = {
+        motor_id: (await client.get(f"/api/data/{motor_id}/history")).headers["etag"]
+        for motor_id in (303, 304)}
+    await client.post("/api/data/batch", json=[{"motor_id": 303, "temperature": 62.0, "voltage": 220.0}])
+    statuses = {
+        motor_id: (await client.get(
+            f"/api/data/{motor_id}/history", headers={"If-None-Match": etags[motor_id]})).status_code
+        for motor_id in (303, 304)}
+    assert statuses == {303: 200, 304: 304}
+
+async def test_thresholds_not_modified_until_update(client):
+    assert (await client.get("/api/thresholds/305")).status_code == 404
+    thresholds = {"motor_id": 305, "temp_max": 80.0, "voltage_min": 200.0, "voltage_max": 240.0}
+    await client.post("/api/thresholds/", json=thresholds)
+    response = await client.get("/api/thresholds/305")
+    assert response.json() == thresholds
+    etag = response.headers["etag"]
+    assert (await client.get("/api/thresholds/305", headers={"If-None-Match": etag})).status_code == 304
+
+    # Rechargement périodique sans changement : le cache est conservé
+    await server.threshold_cache.load()
+    assert (await client.get("/api/thresholds/305", headers={"If-None-Match": etag})).status_code == 304
+
+    await client.post("/api/thresholds/", json=dict(thresholds, temp_max=85.0))
+    response = await client.get("/api/thresholds/305", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["temp_max"] == 85.0
@@ -0,0 +1,56 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+import server
+
+pytestmark = pytest.mark.anyio
+
+async def test_writer_survives_non_sqlite_errors(client):
+    # Erreur hors sqlite3.Error levée dans le thread écrivain, dans la même
+    # transaction qu'une écriture valide
+    bad = server.storage.insert_readings([(2 ** 70, 60.0, 220.0, datetime.now())])
+    good = server.storage.insert_readings([(401, 60.0, 220.0, datetime.now())])
+    results = await asyncio.wait_for(asyncio.gather(bad, good, return_exceptions=True), 5)
+    assert isinstance(results[0], OverflowError)
+    assert results[1] is None
+
+    assert server.storage.writer.is_alive()
+    response = await asyncio.wait_for(
+        client.post("/api/data/", json={"motor_id": 401, "temperature": 61.0, "voltage": 220.0}), 5)
+    assert response.status_code == 200
+    rows = (await client.get("/api/data/401/history")).json()
+    assert [row["temperature"] for row in rows] == [61.0, 60.0]
+
+@pytest.mark.parametrize("motor_id", [0, -1, 2 ** 31, 2 ** 70])
+async def test_out_of_range_motor_id_rejected(client, motor_id):
+    response = await client.post("/api/data/", json={"motor_id": motor_id, "temperature": 60.0, "voltage": 220.0})
+    assert response.status_code == 422
+    response = await client.post("/api/data/batch", json=[
+        {"motor_id": motor_id, "temperature": 60.0, "voltage": 220.0}])
+    assert response.status_code == 422
+    response = await client.post("/api/thresholds/", json={
+        "motor_id": motor_id, "temp_max": 80.0, "voltage_min": 200.0, "voltage_max": 240.0})
+    assert response.status_code == 422
+    assert server.storage.writer.is_alive()
+
+def test_storage_backend_must_implement_interface():
+    server.SqliteStorage(":memory:")
+    server.PostgresStorage("postgresql://localhost/unused")
+    # Un backend incomplet échoue dès sa création, pas au premier appel
+    methods = {name: getattr(server.SqliteStorage, name) for name in server.Storage.__abstractmethods__}
+    del methods["history"]
+    with pytest.raises(TypeError, match="history"):
+        type("Incomplete", (server.Storage,), methods)()
+
+async def test_motors_include_raw_readings(client):
+    # Mesures sans seuils ni agrégats, comme dans la base thermocouple.db fournie
+    def insert(conn):
+        conn.executemany(
+            "INSERT INTO thermocouple_data (motor_id, temperature, voltage, timestamp) VALUES (?, ?, ?, ?)",
+            [(motor_id, 60.0, 220.0, datetime(2025, 1, 1)) for motor_id in (411, 412, 412)])
+    await server.storage.write(insert)
+    motors = (await client.get("/api/motors")).json()
+    assert {411, 412} <= set(motors)
+    assert motors == sorted(motors)
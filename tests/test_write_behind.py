@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+import server
+
+pytestmark = pytest.mark.anyio
+
+THRESHOLDS = {"temp_max": 80.0, "voltage_min": 200.0, "voltage_max": 240.0}
+
+@pytest.fixture(autouse=True)
+def small_queue(monkeypatch):
+    """File write-behind de 2 places dont le lot attend son délai sans être écrit"""
+    monkeypatch.setattr(server, "INGEST_WRITE_BEHIND", True)
+    monkeypatch.setattr(server, "INGEST_QUEUE_MAX_SIZE", 2)
+    monkeypatch.setattr(server, "INGEST_FLUSH_INTERVAL", 60)
+
+async def fill(client, motor_id):
+    await client.post("/api/thresholds/", json={"motor_id": motor_id, **THRESHOLDS})
+    for temperature in (60.0, 61.0):
+        response = await client.post(
+            "/api/data/", json={"motor_id": motor_id, "temperature": temperature, "voltage": 220.0})
+        assert response.status_code == 200
+    assert not server.write_behind.has_room(1)
+
+def engine_state(motor_id):
+    alerts = server.alert_engine.states[motor_id]
+    return (
+        server.alert_engine.active_alerts(motor_id),
+        list(alerts.window),
+        server.anomaly_detector.state[server.anomaly_detector.rows[motor_id]].copy(),
+        server.ingest_readings.values[(motor_id,)])
+
+async def test_rejected_reading_leaves_state_unchanged(client):
+    await fill(client, 501)
+    before = engine_state(501)
+    # Au-dessus du seuil : acceptée, elle entrerait dans la fenêtre des alertes
+    response = await client.post("/api/data/", json={"motor_id": 501, "temperature": 120.0, "voltage": 220.0})
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "1"
+    after = engine_state(501)
+    assert after[0] == before[0] == []
+    assert after[1] == before[1]
+    np.testing.assert_array_equal(after[2], before[2])
+    assert after[3] == before[3] == 2
+    assert server.write_behind.stats["rejected"] == 1
+
+async def test_rejected_batch_leaves_state_unchanged(client):
+    await fill(client, 502)
+    before = engine_state(502)
+    response = await client.post("/api/data/batch", json=[
+        {"motor_id": 502, "temperature": 120.0 + i, "voltage": 150.0} for i in range(10)])
+    assert response.status_code == 429
+    after = engine_state(502)
+    assert after[:2] == before[:2]
+    np.testing.assert_array_equal(after[2], before[2])
+    assert after[3] == before[3]
+
+async def test_queued_readings_written_on_stop(client):
+    await fill(client, 504)
+    await server.write_behind.stop()
+    rows = (await client.get("/api/data/504/history")).json()
+    assert [row["temperature"] for row in rows] == [61.0, 60.0]